@@ -0,0 +1,337 @@
+# asgi.py
+"""
+비동기(ASGI) 서버 모드
+- 핫 경로(/track, /log-email, /process-requests)는 비동기 DB 드라이버로 직접 처리
+- 나머지 라우트(/logs, /download_log, /stats 등)는 기존 Flask 앱으로 전달
+- 모델/검증/캐시/토큰은 app.py의 것을 그대로 사용
+실행: SERVER_MODE=asgi gunicorn -c gunicorn.conf.py  (로컬: uvicorn asgi:app)
+"""
+import asyncio
+import functools
+import os
+import time
+from contextlib import asynccontextmanager
+from itertools import islice
+
+from a2wsgi import WSGIMiddleware
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+
+import app as tracking
+import metrics
+from app import (
+    BULK_INGEST_CHUNK_SIZE,
+    PIXEL_ALLOW_304,
+    PIXEL_ETAG,
+    PIXEL_GIF,
+    PIXEL_HEADERS,
+    PIXEL_LAST_MODIFIED,
+    SSE_BACKFILL_LIMIT,
+    SSE_KEEPALIVE_INTERVAL,
+    SSE_MAX_DURATION,
+    build_open_event,
+    build_send_row,
+    cache_send_record,
+    fetch_opens_since,
+    format_sse,
+    insert_send_rows,
+    issue_token,
+    open_hub,
+    parse_last_event_id,
+    parse_ndjson_line,
+    record_opens,
+    resolve_open_events,
+    save_send_chunk,
+    validate_send_items,
+)
+
+logger = tracking.app.logger
+
+
+# -----------------------
+# 비동기 엔진/세션
+# -----------------------
+def async_database_url(url):
+    """동기 DATABASE_URL을 비동기 드라이버 URL로 변환 (postgresql -> asyncpg, sqlite -> aiosqlite)"""
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    if url.startswith("postgresql://") or url.startswith("postgresql+psycopg2://"):
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or async_database_url(tracking.DATABASE_URL)
+
+engine_options = {"pool_pre_ping": True}
+if ASYNC_DATABASE_URL.startswith("postgresql+asyncpg"):
+    # 동기 풀(쓰기/조회)도 Flask 라우트와 write-behind 플러셔용으로 함께 열려 있으므로 쓰기 풀과 같은 크기로 시작
+    engine_options.update(
+        pool_size=int(os.getenv("ASYNC_POOL_SIZE", tracking.POOL_SIZE)),
+        max_overflow=int(os.getenv("ASYNC_MAX_OVERFLOW", tracking.MAX_OVERFLOW)),
+        pool_recycle=int(os.getenv("SQLALCHEMY_POOL_RECYCLE", 1800)),
+    )
+    if os.getenv("SQLALCHEMY_SSLMODE", "require") != "disable":
+        engine_options["connect_args"] = {"ssl": os.getenv("SQLALCHEMY_SSLMODE", "require")}
+
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+metrics.instrument_engine(async_engine.sync_engine, "async")
+
+
+# -----------------------
+# 핫 경로 핸들러
+# -----------------------
+def timed(route):
+    """핸들러 지연 시간을 Flask 라우트와 같은 히스토그램에 기록 (Flask로 전달되는 라우트는 Flask 쪽에서 기록)"""
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(request):
+            started = time.perf_counter()
+            status = 500
+            try:
+                response = await handler(request)
+                status = response.status_code
+                return response
+            finally:
+                metrics.REQUEST_LATENCY.observe(time.perf_counter() - started, route, request.method, status)
+        return wrapper
+    return decorator
+
+
+def pixel_response(request):
+    """메모리 픽셀 응답 (Flask 모드와 같은 캐시 헤더/304 처리)"""
+    headers = dict(PIXEL_HEADERS)
+    headers["ETag"] = f'"{PIXEL_ETAG}"'
+    headers["Last-Modified"] = PIXEL_LAST_MODIFIED.strftime("%a, %d %b %Y %H:%M:%S GMT")
+    if PIXEL_ALLOW_304 and (
+        PIXEL_ETAG in request.headers.get("if-none-match", "") or "if-modified-since" in request.headers
+    ):
+        return Response(status_code=304, headers=headers)
+    return Response(PIXEL_GIF, media_type="image/gif", headers=headers)
+
+
+@timed("/track")
+async def track_email(request):
+    """이메일 열람 트래킹 (비동기 DB 저장)"""
+    event, error = build_open_event(
+        token=request.query_params.get("t"),
+        email=request.query_params.get("email"),
+        client_ip=request.client.host if request.client else None,
+        user_agent=request.headers.get("user-agent"),
+    )
+    if error:
+        return PlainTextResponse(error, status_code=400)
+    if event is None:
+        return pixel_response(request)
+
+    # write-behind 모드는 동기 버퍼를 공유 (block 정책은 이벤트 루프를 막지 않도록 스레드에서)
+    if tracking.open_buffer is not None:
+        if tracking.open_buffer.policy == "block":
+            await run_in_threadpool(tracking.open_buffer.put, event)
+        else:
+            tracking.open_buffer.put(event)
+        return pixel_response(request)
+
+    async with AsyncSessionLocal() as session:
+        try:
+            def save(db):
+                rows = resolve_open_events(db, [event])
+                if rows:
+                    record_opens(db, rows)
+            await session.run_sync(save)
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            logger.error("열람 기록 저장 오류: %s", e)
+            return PlainTextResponse("열람 기록 저장 오류", status_code=500)
+
+    return pixel_response(request)
+
+
+@timed("/log-email")
+async def log_email(request):
+    """이메일 발송 기록 저장"""
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    if not isinstance(data, dict) or not data.get("email") or not data.get("send_time"):
+        return JSONResponse({"error": "email과 send_time이 필요합니다."}, status_code=400)
+
+    try:
+        row = build_send_row(data, request.client.host if request.client else "", request.headers.get("user-agent", ""))
+    except (ValueError, TypeError) as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+
+    async with AsyncSessionLocal() as session:
+        try:
+            send_id = (await session.run_sync(lambda db: insert_send_rows(db, [row])))[0]
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            logger.error("이메일 발송 기록 저장 오류: %s", e)
+            return JSONResponse({"error": str(e)}, status_code=500)
+
+    cache_send_record(send_id, row["email"], row["send_time"])
+    token = issue_token(send_id)
+    tracking_url = request.url_for("track_email").include_query_params(
+        **({"t": token} if token else {"email": row["email"]})
+    )
+    return JSONResponse({
+        "message": "이메일 발송 기록이 저장되었습니다.",
+        "token": token,
+        "tracking_url": str(tracking_url),
+    })
+
+
+async def iter_ndjson_lines(request):
+    """요청 본문을 버퍼링하지 않고 줄 단위로 전달"""
+    pending = b""
+    async for chunk in request.stream():
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+
+@timed("/process-requests")
+async def process_requests(request):
+    """발송 기록 일괄 저장 (JSON 배열 또는 NDJSON 스트림)"""
+    client_ip = request.client.host if request.client else "127.0.0.1"
+    user_agent = request.headers.get("user-agent") or "BatchProcessor/1.0"
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+
+    inserted, errors = [], []
+
+    async def save_chunk(chunk):
+        indexes, rows, chunk_errors = validate_send_items(chunk, client_ip, user_agent)
+        errors.extend(chunk_errors)
+        if not rows:
+            return
+        async with AsyncSessionLocal() as session:
+            chunk_inserted, chunk_errors = await session.run_sync(lambda db: save_send_chunk(db, indexes, rows))
+        inserted.extend(chunk_inserted)
+        errors.extend(chunk_errors)
+
+    if content_type in ("application/x-ndjson", "application/jsonl"):
+        chunk, index = [], 0
+        async for line in iter_ndjson_lines(request):
+            item = parse_ndjson_line(line)
+            if item is None:
+                continue
+            chunk.append((index, item))
+            index += 1
+            if len(chunk) >= BULK_INGEST_CHUNK_SIZE:
+                await save_chunk(chunk)
+                chunk = []
+        if chunk:
+            await save_chunk(chunk)
+    else:
+        try:
+            items = await request.json()
+        except ValueError:
+            items = None
+        if not isinstance(items, list):
+            return JSONResponse({"error": "요청 데이터를 JSON 배열 또는 NDJSON으로 전달해야 합니다."}, status_code=400)
+        numbered = enumerate(items)
+        while True:
+            chunk = list(islice(numbered, BULK_INGEST_CHUNK_SIZE))
+            if not chunk:
+                break
+            await save_chunk(chunk)
+
+    logger.info("발송 기록 일괄 저장: 성공 %d건, 오류 %d건", len(inserted), len(errors))
+    return JSONResponse({
+        "message": f"{len(inserted)}개의 요청이 성공적으로 처리되었습니다.",
+        "tokens": [
+            {"index": index, "email": email, "token": issue_token(send_id)}
+            for index, email, send_id in inserted
+        ],
+        "errors": errors,
+    })
+
+
+# 새 이벤트가 있는지 링 버퍼를 확인하는 주기(초) - 메모리만 확인하므로 가벼움
+SSE_CHECK_INTERVAL = 0.5
+# 동시 SSE 연결 수 상한 (프로세스별) - 스레드는 잡지 않으므로 WSGI보다 크게
+ASGI_SSE_MAX_SUBSCRIBERS = int(os.getenv("ASGI_SSE_MAX_SUBSCRIBERS", 100))
+
+
+async def stream_logs(request):
+    """열람 기록 SSE - 이벤트 루프에서 대기하므로 연결마다 스레드를 잡지 않음"""
+    try:
+        last_id = parse_last_event_id(request.headers.get("last-event-id") or request.query_params.get("last_id"))
+    except ValueError:
+        return PlainTextResponse("잘못된 Last-Event-ID", status_code=400)
+    email = (request.query_params.get("email") or "").strip() or None
+    if open_hub.subscribers >= ASGI_SSE_MAX_SUBSCRIBERS:
+        return PlainTextResponse(
+            "실시간 피드 연결 수가 너무 많습니다. 잠시 후 다시 시도하세요.", status_code=503,
+            headers={"Retry-After": "30"},
+        )
+
+    async def events(last_id):
+        start_id = await run_in_threadpool(open_hub.subscribe)
+        if last_id is None:
+            last_id = start_id
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + SSE_MAX_DURATION
+        idle = 0.0
+        try:
+            yield "retry: 3000\n\n"
+            while loop.time() < deadline:
+                batch = open_hub.events_after(last_id)
+                if batch is None:
+                    batch = await run_in_threadpool(fetch_opens_since, last_id, SSE_BACKFILL_LIMIT)
+                    if not batch:
+                        # DB에도 없음 (기록 초기화 등) -> 같은 구간을 반복 조회하지 않도록 버퍼 시작점으로
+                        last_id = open_hub.skip_to_buffer(last_id)
+                for event_id, data in batch:
+                    last_id = event_id
+                    if not email or data["email"] == email:
+                        yield format_sse(event_id, data)
+                if batch:
+                    idle = 0.0
+                    continue
+                await asyncio.sleep(SSE_CHECK_INTERVAL)
+                idle += SSE_CHECK_INTERVAL
+                if idle >= SSE_KEEPALIVE_INTERVAL:
+                    idle = 0.0
+                    yield ": keepalive\n\n"
+        finally:
+            open_hub.unsubscribe()
+
+    return StreamingResponse(
+        events(last_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# -----------------------
+# ASGI 앱
+# -----------------------
+@asynccontextmanager
+async def lifespan(_app):
+    yield
+    await async_engine.dispose()
+
+
+app = Starlette(
+    routes=[
+        Route("/track", track_email, methods=["GET"], name="track_email"),
+        Route("/log-email", log_email, methods=["POST"]),
+        Route("/process-requests", process_requests, methods=["POST"]),
+        Route("/logs/stream", stream_logs, methods=["GET"], name="stream_logs"),
+        # 그 외 라우트는 기존 Flask 앱이 처리
+        Mount("/", app=WSGIMiddleware(tracking.app)),
+    ],
+    lifespan=lifespan,
+)
@@ -0,0 +1,340 @@
+# benchmark.py
+"""
+트래킹 엔드포인트 부하 테스트/벤치마크
+
+로컬 SQLite(기본) 또는 Postgres에 앱을 띄우고, 테이블을 원하는 크기로 채운 뒤
+라우트별로 동시 요청을 보내 처리량, p50/p95/p99 지연 시간, 요청당 DB 왕복 수를 측정한다.
+결과는 JSON으로 저장되며 --compare로 이전 결과와 비교할 수 있다.
+
+예)
+  python benchmark.py --rows 100000 --requests 2000 --concurrency 32 --output bench_results.json
+  python benchmark.py --server asgi --compare bench_results.json
+  TRACK_WRITE_MODE=buffered python benchmark.py --routes track track_token
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+ROUTES = ("track", "track_token", "log_email", "process_requests", "view_logs", "download_log")
+
+# 실제 트래픽처럼 소수의 User-Agent만 돌려 쓴다 (요청마다 다르면 user_agents 행이 매번 새로 생긴다)
+USER_AGENTS = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36 Edg/120.0",
+    "Mozilla/5.0",
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="트래킹 엔드포인트 벤치마크")
+    parser.add_argument("--db-url", default=None, help="DB URL (기본: 임시 SQLite 파일)")
+    parser.add_argument("--server", choices=("wsgi", "asgi"), default="wsgi", help="서버 모드")
+    parser.add_argument("--rows", type=int, default=10000, help="미리 채울 발송/열람 기록 수")
+    parser.add_argument("--requests", type=int, default=1000, help="라우트별 요청 수")
+    parser.add_argument("--concurrency", type=int, default=16, help="동시 요청 수")
+    parser.add_argument("--batch-size", type=int, default=1000, help="/process-requests 한 요청의 항목 수")
+    parser.add_argument("--routes", nargs="+", choices=ROUTES, default=list(ROUTES))
+    parser.add_argument("--port", type=int, default=0, help="서버 포트 (0이면 자동)")
+    parser.add_argument("--output", default="bench_results.json", help="결과 JSON 경로")
+    parser.add_argument("--compare", default=None, help="비교할 이전 결과 JSON")
+    return parser.parse_args()
+
+
+# -----------------------
+# 앱 준비
+# -----------------------
+def load_app(db_url):
+    """환경 변수를 설정한 뒤 앱을 import (app.py는 import 시점에 DB 설정을 읽음)"""
+    os.environ["DATABASE_URL"] = db_url
+    os.environ.setdefault("TRACKING_TOKEN_SECRET", "benchmark")
+    # 단일 IP에서 몰아서 보내므로 요청 제한은 끔
+    os.environ.setdefault("TRACK_RATE_LIMIT_IP_RATE", "0")
+    os.environ.setdefault("TRACK_RATE_LIMIT_KEY_RATE", "0")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import app as tracking
+
+    # import 시점에는 테이블을 만들지 않으므로 직접 초기화
+    tracking.init_db()
+    # 벤치마크 중 로그 출력이 측정을 방해하지 않도록
+    logging.getLogger().setLevel(logging.WARNING)
+    for name in ("sqlalchemy.engine", "app", "werkzeug", "apscheduler"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    tracking.app.logger.setLevel(logging.WARNING)
+    return tracking
+
+
+def seed(tracking, rows):
+    """발송 기록/열람 기록을 rows 개씩 채운다. 반환: (email 목록, 발송 id 목록)"""
+    from sqlalchemy import insert, select, func
+
+    with tracking.SessionLocal() as db:
+        existing = db.execute(select(func.count()).select_from(tracking.EmailSendLog)).scalar()
+    emails = [f"user{i}@example.com" for i in range(rows)]
+    if existing < rows:
+        now = datetime.now(timezone.utc)
+        with tracking.engine.begin() as conn:
+            for start in range(existing, rows, 5000):
+                chunk = range(start, min(start + 5000, rows))
+                conn.execute(insert(tracking.EmailSendLog), [
+                    {
+                        "email": emails[i],
+                        "send_time": now - timedelta(days=1, seconds=i),
+                        "client_ip": "127.0.0.1",
+                        "user_agent": "benchmark-seed",
+                    }
+                    for i in chunk
+                ])
+                conn.execute(insert(tracking.EmailLog), [
+                    {
+                        "timestamp": now - timedelta(seconds=i),
+                        "email": emails[i],
+                        "send_time": now - timedelta(days=1, seconds=i),
+                        "client_ip": "127.0.0.1",
+                        "user_agent": "benchmark-seed",
+                    }
+                    for i in chunk
+                ])
+    with tracking.SessionLocal() as db:
+        send_ids = list(db.execute(select(tracking.EmailSendLog.id).limit(rows)).scalars())
+    return emails, send_ids
+
+
+class QueryCounter:
+    """엔진 이벤트로 실행된 SQL 문 수를 센다 (DB 왕복 수 근사)"""
+
+    def __init__(self, engines):
+        from sqlalchemy import event
+
+        self.count = 0
+        self._lock = threading.Lock()
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        with self._lock:
+            self.count += 1
+
+    def reset(self):
+        with self._lock:
+            value, self.count = self.count, 0
+        return value
+
+
+def start_server(tracking, mode, port):
+    """백그라운드 스레드에서 서버 시작. 반환: (base_url, 카운터에 등록할 엔진 목록)"""
+    if mode == "asgi":
+        import socket
+        import uvicorn
+        import asgi
+
+        if not port:
+            with socket.socket() as sock:
+                sock.bind(("127.0.0.1", 0))
+                port = sock.getsockname()[1]
+        server = uvicorn.Server(uvicorn.Config(asgi.app, host="127.0.0.1", port=port, log_level="warning"))
+        threading.Thread(target=server.run, daemon=True).start()
+        while not server.started:
+            time.sleep(0.05)
+        return f"http://127.0.0.1:{port}", [tracking.engine, tracking.read_engine, asgi.async_engine.sync_engine]
+
+    from werkzeug.serving import make_server
+
+    server = make_server("127.0.0.1", port, tracking.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", [tracking.engine, tracking.read_engine]
+
+
+# -----------------------
+# 부하 생성/측정
+# -----------------------
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def run_scenario(make_request, total, concurrency, counter):
+    """make_request(session, i)를 total 번 동시 실행하고 지표 계산"""
+    import requests
+
+    local = threading.local()
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def worker(i):
+        nonlocal errors
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        started = time.perf_counter()
+        try:
+            response = make_request(local.session, i)
+            ok = response.status_code < 400
+        except Exception:
+            ok = False
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors += 1
+
+    counter.reset()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(worker, range(total)))
+    wall = time.perf_counter() - started
+    queries = counter.reset()
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "concurrency": concurrency,
+        "duration_s": round(wall, 3),
+        "throughput_rps": round(total / wall, 1) if wall else None,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99": round(percentile(latencies, 0.99) * 1000, 2),
+            "max": round(latencies[-1] * 1000, 2),
+        },
+        "db_queries_per_request": round(queries / total, 2),
+    }
+
+
+def build_scenarios(args, tracking, base_url, emails, send_ids):
+    send_time = (datetime.now(timezone.utc) - timedelta(hours=1)).astimezone(tracking.KST).strftime("%Y-%m-%d %H:%M:%S")
+    tokens = [tracking.token_signer.sign(send_id) for send_id in send_ids] or ["invalid"]
+
+    def track(session, i):
+        return session.get(f"{base_url}/track", params={"email": random.choice(emails)},
+                           headers={"User-Agent": random.choice(USER_AGENTS)})
+
+    def track_token(session, i):
+        return session.get(f"{base_url}/track", params={"t": random.choice(tokens)},
+                           headers={"User-Agent": random.choice(USER_AGENTS)})
+
+    def log_email(session, i):
+        return session.post(f"{base_url}/log-email", json={"email": f"new{i}@example.com", "send_time": send_time})
+
+    batch = [{"email": f"batch{i}@example.com", "send_time": send_time} for i in range(args.batch_size)]
+
+    def process_requests(session, i):
+        return session.post(f"{base_url}/process-requests", json=batch)
+
+    def view_logs(session, i):
+        return session.get(f"{base_url}/logs")
+
+    def download_log(session, i):
+        return session.get(f"{base_url}/download_log")
+
+    # 무거운 라우트는 요청 수를 줄여서 측정
+    heavy = max(args.requests // 100, 5)
+    return {
+        "track": (track, args.requests),
+        "track_token": (track_token, args.requests),
+        "log_email": (log_email, args.requests),
+        "process_requests": (process_requests, max(args.requests // 50, 5)),
+        "view_logs": (view_logs, max(args.requests // 10, 10)),
+        "download_log": (download_log, heavy),
+    }
+
+
+def compare(results, baseline_path):
+    """이전 결과 대비 처리량/지연 변화율 출력"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    print(f"\n기준 결과와 비교: {baseline_path}")
+    for route, current in results.items():
+        before = baseline.get(route)
+        if not before:
+            continue
+
+        def change(new, old):
+            return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+        print(
+            f"  {route:18s} rps {change(current['throughput_rps'], before['throughput_rps']):>8s}  "
+            f"p95 {change(current['latency_ms']['p95'], before['latency_ms']['p95']):>8s}  "
+            f"p99 {change(current['latency_ms']['p99'], before['latency_ms']['p99']):>8s}  "
+            f"queries/req {before['db_queries_per_request']} -> {current['db_queries_per_request']}"
+        )
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL,
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def main():
+    args = parse_args()
+    db_url = args.db_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'benchmark.db')}"
+
+    tracking = load_app(db_url)
+    print(f"DB: {db_url} / 서버: {args.server} / 시드: {args.rows}건")
+    emails, send_ids = seed(tracking, args.rows)
+    base_url, engines = start_server(tracking, args.server, args.port)
+    counter = QueryCounter(engines)
+
+    scenarios = build_scenarios(args, tracking, base_url, emails, send_ids)
+    results = {}
+    for route in args.routes:
+        make_request, total = scenarios[route]
+        results[route] = result = run_scenario(make_request, total, args.concurrency, counter)
+        print(
+            f"{route:18s} {result['throughput_rps']:>8} rps  "
+            f"p50 {result['latency_ms']['p50']:>7}ms  p95 {result['latency_ms']['p95']:>7}ms  "
+            f"p99 {result['latency_ms']['p99']:>7}ms  queries/req {result['db_queries_per_request']}  "
+            f"errors {result['errors']}"
+        )
+    if tracking.engine.dialect.name == "sqlite" and "process_requests" in args.routes:
+        # SQLite 드라이버는 sort_by_parameter_order가 붙은 INSERT ... RETURNING을 행마다 따로 실행한다
+        print("참고: SQLite에서는 process_requests의 INSERT ... RETURNING이 행 단위로 실행되어 "
+              "queries/req가 배치 크기만큼 나온다. Postgres의 다건 INSERT 경로와는 다르므로 --db-url로 따로 측정할 것")
+
+    # write-behind 모드면 남은 이벤트를 저장해 다음 실행에 영향이 없도록
+    if tracking.open_buffer is not None:
+        tracking.open_buffer.flush()
+
+    output = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "database": tracking.engine.dialect.name,
+            "server": args.server,
+            "track_write_mode": tracking.TRACK_WRITE_MODE,
+            "rows": args.rows,
+            "concurrency": args.concurrency,
+            "batch_size": args.batch_size,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(output, f, ensure_ascii=False, indent=2)
+    print(f"결과 저장: {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
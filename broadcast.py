@@ -0,0 +1,133 @@
+# broadcast.py
+"""
+열람 이벤트 실시간 전달용 프로세스 내 브로드캐스트 허브 (/logs/stream SSE)
+- 폴러 스레드 하나가 DB에서 새 열람 기록(id > 마지막 id)을 가져와 링 버퍼에 넣고, 구독자 전체에 알린다.
+  (다른 워커/ASGI 경로에서 저장된 기록도 같은 방식으로 전달된다)
+- 이 프로세스에서 열람 기록이 커밋되면 notify()로 폴러를 바로 깨운다.
+- 구독자가 없으면 DB를 조회하지 않는다.
+- 이벤트 id는 email_logs.id 이므로 재연결 시 Last-Event-ID로 이어 받을 수 있다.
+"""
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class BroadcastHub:
+    """
+    latest_id() -> 현재 가장 큰 id (없으면 0)
+    fetch_since(after_id, limit) -> [(id, data)] (id 오름차순)
+    """
+
+    def __init__(self, latest_id, fetch_since, size=1000, poll_interval=2.0, min_poll_gap=0.2):
+        self._latest_id = latest_id
+        self._fetch_since = fetch_since
+        self.size = size
+        self.poll_interval = poll_interval
+        self.min_poll_gap = min_poll_gap
+        self._events = deque(maxlen=size)  # (id, data)
+        self._cond = threading.Condition()
+        self._nudge = threading.Event()
+        self._thread = None
+        self.last_id = None  # 폴러가 마지막으로 확인한 id
+        self._buffer_start = 0  # 버퍼는 (_buffer_start, last_id] 구간의 이벤트를 빠짐없이 담고 있음
+        self.subscribers = 0
+
+    # -----------------------
+    # 구독
+    # -----------------------
+    def subscribe(self, limit=None):
+        """
+        구독 시작. 반환: 지금 시점의 마지막 id (이후 이벤트만 받으려면 이 값부터).
+        구독자가 이미 limit 명이면 구독하지 않고 None.
+        """
+        with self._cond:
+            if limit is not None and self.subscribers >= limit:
+                return None
+            self.subscribers += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="sse-broadcast", daemon=True)
+                self._thread.start()
+        self._nudge.set()
+        return self.current_id()
+
+    def unsubscribe(self):
+        with self._cond:
+            self.subscribers = max(0, self.subscribers - 1)
+
+    def current_id(self):
+        with self._cond:
+            if self.last_id is not None:
+                return self.last_id
+        return self._latest_id()
+
+    def events_after(self, last_id):
+        """
+        링 버퍼에서 last_id 이후 이벤트 목록.
+        버퍼가 last_id 직후부터 담고 있지 않으면(오래 끊겼던 재연결 등) None -> 호출자가 DB에서 조회.
+        """
+        with self._cond:
+            if self.last_id is None or last_id < self._buffer_start:
+                return None
+            return [event for event in self._events if event[0] > last_id]
+
+    def skip_to_buffer(self, last_id):
+        """
+        DB에도 last_id 이후 기록이 없을 때(기록 초기화 등) 이어 받을 위치를 버퍼 시작점으로 옮김.
+        (그대로 두면 events_after가 계속 None이라 같은 구간을 DB에서 반복 조회하게 됨)
+        """
+        with self._cond:
+            if self.last_id is None:
+                return last_id
+            return max(last_id, self._buffer_start)
+
+    def wait(self, last_id, timeout):
+        """last_id 이후 이벤트가 생길 때까지 대기. 생겼으면 True"""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self.last_id is not None and self.last_id > last_id, timeout=timeout
+            )
+
+    def notify(self):
+        """새 기록이 커밋되었음을 알림 (폴러를 바로 깨움)"""
+        if self.subscribers:
+            self._nudge.set()
+
+    # -----------------------
+    # 폴러
+    # -----------------------
+    def _run(self):
+        while True:
+            self._nudge.wait(self.poll_interval)
+            self._nudge.clear()
+            if not self.subscribers:
+                continue
+            try:
+                self._poll()
+            except Exception as e:
+                logger.error("실시간 열람 이벤트 조회 오류: %s", e)
+            time.sleep(self.min_poll_gap)  # 열람이 몰릴 때 조회 횟수 제한
+
+    def _poll(self):
+        if self.last_id is None:
+            # 처음 시작할 때는 이후 이벤트만 전달
+            latest = self._latest_id()
+            with self._cond:
+                self.last_id = self._buffer_start = latest
+                self._cond.notify_all()
+            return
+        while True:
+            events = self._fetch_since(self.last_id, self.size)
+            if not events:
+                return
+            with self._cond:
+                for event in events:
+                    if len(self._events) == self._events.maxlen:
+                        self._buffer_start = self._events[0][0]
+                    self._events.append(event)
+                self.last_id = events[-1][0]
+                self._cond.notify_all()
+            if len(events) < self.size:
+                return
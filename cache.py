@@ -0,0 +1,143 @@
+# cache.py
+"""프로세스 내 메모리 캐시 (LRU + TTL) / 중복 판별용 Bloom filter"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+
+# 캐시에 값이 없음을 나타내는 표식 (None도 캐시할 수 있도록 별도 객체 사용)
+MISSING = object()
+
+
+class TTLCache:
+    """
+    최대 maxsize 개까지 저장하는 LRU 캐시. 각 항목은 ttl 초 후 만료된다.
+    "없음" 결과처럼 빨리 바뀔 수 있는 값은 set(..., ttl=짧은 값)으로 따로 저장한다.
+    """
+
+    def __init__(self, maxsize=10000, ttl=300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (만료 시각, 값)
+        self._lock = threading.Lock()
+
+        # 통계 카운터
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """값을 반환, 없거나 만료되었으면 MISSING"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return MISSING
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return MISSING
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def add(self, key, value=True, ttl=None):
+        """
+        key가 없거나 만료되었을 때만 저장하고 True 반환 (있으면 False, 만료 시각은 그대로).
+        중복 판별처럼 조회와 저장이 원자적이어야 할 때 사용한다.
+        """
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[0] > now:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return False
+            if item is not None:
+                self.expirations += 1
+            self.misses += 1
+            self._data[key] = (now + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+            return True
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class BloomFilter:
+    """
+    고정 크기 비트 배열로 "이미 본 값"을 판별 (메모리는 capacity로 고정).
+    capacity 개까지는 오탐(처음 보는 값을 본 것으로 판단)이 error_rate 이하, 미탐은 없다.
+    요청 하나 안에서만 쓰는 용도라 잠금은 없다.
+    """
+
+    def __init__(self, capacity, error_rate=1e-5):
+        self.capacity = capacity
+        self.size = max(64, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # 해시 두 개를 조합해 hash_count 개의 위치 생성 (Kirsch-Mitzenmacher)
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        """key를 추가하고, 처음 보는 값이면 True (이미 있었을 수 있으면 False)"""
+        bits = self._bits
+        new = False
+        for position in self._positions(key):
+            byte, mask = position >> 3, 1 << (position & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+    def __contains__(self, key):
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def is_full(self):
+        """capacity를 넘으면 오탐률이 보장되지 않음"""
+        return self.count >= self.capacity
@@ -0,0 +1,131 @@
+# columnar.py
+"""
+Parquet / Arrow IPC 스트리밍 내보내기 (pyarrow가 설치된 경우에만 사용 가능)
+- 행 청크(서버 측 커서의 partition) 하나를 row group 하나로 기록하고, 기록된 바이트를 바로 응답으로 흘려보낸다.
+- 타임스탬프는 UTC 시간대가 포함된 네이티브 timestamp 컬럼으로 저장한다.
+"""
+import io
+import zipfile
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # 선택 의존성
+    pa = pq = None
+
+# 형식 -> (파일 확장자, MIME 타입)
+FORMATS = {
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+    "arrow": (".arrow", "application/vnd.apache.arrow.file"),
+}
+
+
+def available():
+    return pa is not None
+
+
+def schema(columns):
+    """[(이름, "int64" | "string" | "timestamp" | "bool")] -> Arrow 스키마"""
+    types = {
+        "int64": pa.int64(),
+        "string": pa.string(),
+        "timestamp": pa.timestamp("us", tz="UTC"),  # naive 값은 UTC로 간주
+        "bool": pa.bool_(),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in columns])
+
+
+class StreamSink(io.RawIOBase):
+    """쓰인 바이트를 모아 두었다가 take()로 꺼내는 쓰기 전용 스트림 (seek 불가)"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def take(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def record_batch(table_schema, rows):
+    columns = list(zip(*rows)) if rows else [()] * len(table_schema)
+    return pa.RecordBatch.from_arrays(
+        [pa.array(column, type=field.type) for column, field in zip(columns, table_schema)],
+        schema=table_schema,
+    )
+
+
+def open_writer(fmt, sink, table_schema):
+    if fmt == "parquet":
+        return pq.ParquetWriter(sink, table_schema, compression="zstd")
+    return pa.ipc.new_file(sink, table_schema)
+
+
+def stream_file(fmt, table_schema, partitions):
+    """행 청크 iterable -> 파일 바이트 청크 generator (청크 하나 = row group/record batch 하나)"""
+    sink = StreamSink()
+    writer = open_writer(fmt, sink, table_schema)
+    for rows in partitions:
+        writer.write_batch(record_batch(table_schema, rows))
+        data = sink.take()
+        if data:
+            yield data
+    writer.close()
+    yield sink.take()
+
+
+def stream_zip_by_day(fmt, table_schema, partitions, day_of, prefix):
+    """
+    날짜별 파일(prefix_YYYY-MM-DD.확장자)을 담은 zip 스트림.
+    rows는 날짜순으로 정렬되어 있어야 한다. 이미 압축된 형식이라 zip은 무압축(STORED)으로 저장.
+    """
+    extension = FORMATS[fmt][0]
+    zip_sink = StreamSink()
+    archive = zipfile.ZipFile(zip_sink, "w", compression=zipfile.ZIP_STORED)
+    current_day = entry = file_sink = writer = None
+
+    def close_file():
+        writer.close()
+        entry.write(file_sink.take())
+        entry.close()
+
+    for rows in partitions:
+        # 청크 안에서 날짜가 바뀌는 지점마다 나눠서 기록
+        start = 0
+        while start < len(rows):
+            day = day_of(rows[start])
+            end = start
+            while end < len(rows) and day_of(rows[end]) == day:
+                end += 1
+            if day != current_day:
+                if writer is not None:
+                    close_file()
+                current_day = day
+                entry = archive.open(f"{prefix}_{day.isoformat()}{extension}", "w", force_zip64=True)
+                file_sink = StreamSink()
+                writer = open_writer(fmt, file_sink, table_schema)
+            writer.write_batch(record_batch(table_schema, rows[start:end]))
+            entry.write(file_sink.take())
+            start = end
+        data = zip_sink.take()
+        if data:
+            yield data
+
+    if writer is not None:
+        close_file()
+    archive.close()
+    yield zip_sink.take()
@@ -0,0 +1,88 @@
+# gunicorn.conf.py
+# SERVER_MODE 환경 변수로 WSGI(Flask, 기본) / ASGI(비동기) 모드 전환
+# 워커 수는 WEB_CONCURRENCY로 조정 (스케줄러는 리더 락을 얻은 워커 하나에서만 실행)
+# 지정하지 않으면 CPU 수 기준 값과 DB 연결 예산(DB_CONNECTION_BUDGET / 워커당 풀 크기) 중 작은 값
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+
+SERVER_MODE = os.getenv("SERVER_MODE", "wsgi").lower()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+timeout = 30
+
+# 이 인스턴스의 워커 전체가 열 수 있는 최대 DB 연결 수 (PostgreSQL max_connections 안에서 여유를 두고 설정)
+DB_CONNECTION_BUDGET = int(os.getenv("DB_CONNECTION_BUDGET", 60))
+
+
+def connections_per_worker():
+    """워커 하나가 최대로 여는 DB 연결 수 (app.py/asgi.py 풀 설정과 같은 기본값)"""
+    pool = int(os.getenv("SQLALCHEMY_POOL_SIZE", 5)) + int(os.getenv("SQLALCHEMY_MAX_OVERFLOW", 5))
+    total = pool + int(os.getenv("READ_POOL_SIZE", 3)) + int(os.getenv("READ_MAX_OVERFLOW", 2))
+    if SERVER_MODE == "asgi":
+        # 비동기 풀은 기본적으로 쓰기 풀과 같은 크기
+        total += int(os.getenv("ASYNC_POOL_SIZE", os.getenv("SQLALCHEMY_POOL_SIZE", 5)))
+        total += int(os.getenv("ASYNC_MAX_OVERFLOW", os.getenv("SQLALCHEMY_MAX_OVERFLOW", 5)))
+    return total
+
+
+def default_workers(cpu_workers):
+    return max(1, min(cpu_workers, DB_CONNECTION_BUDGET // connections_per_worker()))
+
+
+if SERVER_MODE == "asgi":
+    # 이벤트 루프 하나가 다수의 픽셀 요청을 동시에 처리 - 코어당 워커 하나
+    wsgi_app = "asgi:app"
+    worker_class = "uvicorn.workers.UvicornWorker"
+    workers = int(os.getenv("WEB_CONCURRENCY") or default_workers(multiprocessing.cpu_count()))
+else:
+    wsgi_app = "app:app"
+    workers = int(os.getenv("WEB_CONCURRENCY") or default_workers(multiprocessing.cpu_count() * 2 + 1))
+    threads = int(os.getenv("GUNICORN_THREADS", 2))
+
+# 워커에서 워커 수를 알 수 있도록 (app.py의 캐시 TTL 기본값 등)
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+# /metrics, /cache-stats는 요청을 받은 워커 하나가 응답하므로, 워커가 여럿이면 공유 디렉터리에
+# 워커별 스냅숏을 모아 합산한다 (METRICS_DIR를 직접 지정하지 않았을 때만 임시 디렉터리 사용)
+if workers > 1 and not os.getenv("METRICS_DIR"):
+    os.environ["METRICS_DIR"] = tempfile.mkdtemp(prefix="tracking-metrics-")
+
+# 워커마다 앱을 따로 import (DB 커넥션/스케줄러 스레드를 fork 전에 만들지 않음)
+preload_app = False
+
+
+def on_starting(server):
+    """
+    워커 시작 전에 한 번만 DB 초기화 (release 단계가 없는 Render 등에서도 스키마가 준비되도록 기본 실행).
+    init-db는 여러 번 실행해도 안전하다. release 단계에서 이미 실행했다면 INIT_DB_ON_START=false로 끌 수 있다.
+    """
+    if os.getenv("INIT_DB_ON_START", "True").lower() != "false":
+        # 마스터 프로세스에 DB 커넥션이 남지 않도록 별도 프로세스에서 실행
+        subprocess.run([sys.executable, "-m", "flask", "--app", "app", "init-db"], check=True)
+
+    # 이전 실행의 메트릭 스냅숏 정리 (워커 카운터는 0부터 다시 시작)
+    metrics_dir = os.getenv("METRICS_DIR")
+    if metrics_dir and os.path.isdir(metrics_dir):
+        for filename in os.listdir(metrics_dir):
+            if filename.endswith((".json", ".tmp")):
+                os.remove(os.path.join(metrics_dir, filename))
+
+
+def post_worker_init(worker):
+    """워커마다 메트릭 스냅숏 기록을 시작하고 스케줄러 리더 선출에 참여 (실제 작업은 리더 하나에서만 실행)"""
+    import app
+
+    app.start_metrics_snapshots()
+    app.start_scheduler()
+
+
+def child_exit(server, worker):
+    """종료된 워커의 메트릭 스냅숏을 누적 합계로 옮김 (카운터가 줄어들지 않도록)"""
+    metrics_dir = os.getenv("METRICS_DIR")
+    if metrics_dir:
+        import metrics
+
+        metrics.retire_process(metrics_dir, worker.pid)
@@ -0,0 +1,143 @@
+# leader.py
+"""
+스케줄러 리더 선출 - 여러 워커/인스턴스 중 락을 얻은 프로세스 하나만 주기 작업을 실행한다.
+- PostgreSQL: 세션 advisory lock (여러 인스턴스 간에도 유효)
+- 그 외: fcntl 파일 락 (같은 호스트의 워커 간)
+리더 프로세스가 죽으면 락이 풀리고, 다른 프로세스가 재시도 중에 리더가 된다.
+"""
+import hashlib
+import logging
+import threading
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+
+def lock_key(name):
+    """락 이름 -> PostgreSQL advisory lock용 64비트 정수 키"""
+    return int.from_bytes(hashlib.sha256(name.encode("utf-8")).digest()[:8], "big", signed=True)
+
+
+class AdvisoryLock:
+    """pg_try_advisory_lock 기반 락. 락을 잡은 커넥션을 프로세스가 살아 있는 동안 유지한다."""
+
+    def __init__(self, engine, name):
+        self.engine = engine
+        self.key = lock_key(name)
+        self._conn = None
+
+    def try_acquire(self):
+        if self._conn is not None:
+            return self.is_held()
+        conn = self.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        try:
+            acquired = conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key}).scalar()
+        except Exception:
+            conn.close()
+            raise
+        if not acquired:
+            conn.close()
+            return False
+        self._conn = conn
+        return True
+
+    def is_held(self):
+        """락을 잡은 세션이 아직 살아 있는지 확인 (끊겼으면 락도 풀린 것)"""
+        if self._conn is None:
+            return False
+        try:
+            self._conn.execute(text("SELECT 1"))
+            return True
+        except Exception:
+            self._close()
+            return False
+
+    def release(self):
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+        except Exception:
+            pass
+        self._close()
+
+    def _close(self):
+        try:
+            self._conn.close()
+        except Exception:
+            pass
+        self._conn = None
+
+
+class FileLock:
+    """fcntl.flock 기반 락 (프로세스가 종료되면 OS가 자동으로 해제)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def try_acquire(self):
+        import fcntl
+
+        if self._file is not None:
+            return True
+        f = open(self.path, "a+")
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        self._file = f
+        return True
+
+    def is_held(self):
+        return self._file is not None
+
+    def release(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class LeaderElection:
+    """
+    interval 초마다 락 획득을 시도해 리더가 되면 on_elected(), 락을 잃으면 on_demoted()를 호출.
+    백그라운드 데몬 스레드에서 동작한다.
+    """
+
+    def __init__(self, lock, on_elected, on_demoted, interval=60.0):
+        self.lock = lock
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.interval = interval
+        self.is_leader = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="scheduler-election", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self.is_leader:
+            self.is_leader = False
+            self.on_demoted()
+        self.lock.release()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if not self.is_leader and self.lock.try_acquire():
+                    self.is_leader = True
+                    logger.info("스케줄러 리더로 선출되었습니다.")
+                    self.on_elected()
+                elif self.is_leader and not self.lock.is_held():
+                    self.is_leader = False
+                    logger.warning("스케줄러 리더 락을 잃었습니다. 작업을 중지합니다.")
+                    self.on_demoted()
+            except Exception as e:
+                logger.error("스케줄러 리더 선출 오류: %s", e)
+            self._stop.wait(self.interval)
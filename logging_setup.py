@@ -0,0 +1,117 @@
+# logging_setup.py
+"""
+큐 기반 비동기 로깅 설정
+- 요청 스레드는 레코드를 큐에 넣기만 하고, 포맷/출력은 QueueListener 스레드가 처리한다.
+- 출력은 한 줄짜리 JSON (LOG_FORMAT=text 이면 일반 텍스트)
+- 서브시스템별 레벨: LOG_LEVELS="sqlalchemy.engine=WARNING,apscheduler=INFO"
+- 열람 이벤트처럼 양이 많은 로그는 sampled_logger()로 일부만 남긴다.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+# SQLAlchemy 쿼리 로그는 기본적으로 끔 (필요하면 LOG_LEVELS에서 INFO로)
+DEFAULT_LEVELS = "sqlalchemy.engine=WARNING,apscheduler=INFO,werkzeug=INFO"
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+# 개별 열람 로그를 남길 비율 (0~1)
+LOG_OPEN_SAMPLE_RATE = float(os.getenv("LOG_OPEN_SAMPLE_RATE", 0.01))
+
+# LogRecord 기본 속성 (이 외의 속성은 extra로 전달된 구조화 필드로 출력)
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener = None
+
+
+class JSONFormatter(logging.Formatter):
+    """로그 레코드를 한 줄 JSON으로 변환 (extra 필드 포함)"""
+
+    def format(self, record):
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    기본 QueueHandler는 큐에 넣기 전에 메시지를 포맷한다.
+    여기서는 레코드를 그대로 넘겨 %-포맷/JSON 직렬화를 리스너 스레드에서 하도록 한다.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class SampleFilter(logging.Filter):
+    """rate 비율의 레코드만 통과 (WARNING 이상은 항상 통과)"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+
+def parse_levels(spec):
+    """"name=LEVEL,name2=LEVEL" -> {name: LEVEL}"""
+    levels = {}
+    for item in spec.split(","):
+        name, sep, level = item.partition("=")
+        if sep and name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging():
+    """루트 로거에 큐 핸들러를 달고 리스너 스레드를 시작 (여러 번 호출해도 한 번만 적용)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    handler = logging.StreamHandler(sys.stderr)
+    if LOG_FORMAT == "json":
+        handler.setFormatter(JSONFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(LazyQueueHandler(log_queue))
+    root.setLevel(LOG_LEVEL)
+
+    levels = parse_levels(DEFAULT_LEVELS)
+    levels.update(parse_levels(LOG_LEVELS))
+    for name, level in levels.items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    _listener.start()
+    # 종료 시 큐에 남은 로그 출력
+    atexit.register(_listener.stop)
+
+
+def sampled_logger(name, rate=None):
+    """rate 비율만 기록하는 로거 (열람 이벤트 등 대량 로그용)"""
+    logger = logging.getLogger(name)
+    if not any(isinstance(f, SampleFilter) for f in logger.filters):
+        logger.addFilter(SampleFilter(LOG_OPEN_SAMPLE_RATE if rate is None else rate))
+    return logger
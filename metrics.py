@@ -0,0 +1,444 @@
+# metrics.py
+"""
+Prometheus 텍스트 형식 메트릭 (/metrics)
+- 카운터/히스토그램은 스레드별 저장소에 잠금 없이 기록하고, 수집(scrape) 시에만 합산한다.
+  (종료된 스레드의 값은 누적 합계로 옮기고 저장소를 해제)
+- 게이지는 수집 시점에 콜백으로 현재 값을 읽는다 (풀 상태, 큐 깊이 등).
+- 워커가 여럿이면(gunicorn) 요청마다 임의의 워커가 /metrics에 응답하므로, 공유 디렉터리
+  (METRICS_DIR)에 워커별 스냅숏({pid}.json)을 주기적으로 쓰고 수집 시 전체 워커 값을 합산한다.
+  카운터/히스토그램은 합계(종료된 워커 값은 retired.json에 누적), 게이지는 워커별로 pid 라벨을 붙인다.
+"""
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+
+from sqlalchemy import event
+
+# 요청/쿼리 지연 시간용 기본 버킷(초)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(labelnames, labels):
+    if not labelnames:
+        return ""
+    pairs = ",".join(
+        f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for name, value in zip(labelnames, labels)
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _add_counter(total, value):
+    return (total or 0) + value
+
+
+def _add_histogram(total, value):
+    if total is None:
+        return list(value)
+    return [a + b for a, b in zip(total, list(value))]
+
+
+# 스냅숏 합산 시 종류별 합치는 방법 (게이지는 합치지 않고 워커별로 보고)
+_COMBINE = {"counter": _add_counter, "histogram": _add_histogram}
+
+
+class _ShardOwner:
+    """스레드 로컬에 함께 보관 -> 스레드가 끝나 해제되면 그 스레드의 저장소를 정리"""
+
+
+class _ThreadSharded:
+    """스레드마다 별도 dict를 두고, 수집 시 전체 스레드 값을 합산"""
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards = []
+        self._retired = {}  # 종료된 스레드들의 합계
+        self._shards_lock = threading.RLock()  # 스레드 시작/종료 시에만 사용
+
+    def _shard(self):
+        shard = getattr(self._local, "values", None)
+        if shard is None:
+            shard = self._local.values = {}
+            owner = self._local.owner = _ShardOwner()
+            with self._shards_lock:
+                self._shards.append(shard)
+            weakref.finalize(owner, self._retire, shard)
+        return shard
+
+    def _retire(self, shard):
+        """종료된 스레드의 값을 누적 합계로 옮기고 저장소 목록에서 제거"""
+        with self._shards_lock:
+            self._merge(self._retired, shard)
+            self._shards.remove(shard)
+
+    def _merge(self, totals, shard):
+        for labels, value in list(shard.items()):
+            totals[labels] = self._combine(totals.get(labels), value)
+        return totals
+
+    def _combine(self, total, value):
+        raise NotImplementedError
+
+    def _totals(self):
+        """종료된 스레드 합계 + 살아 있는 스레드별 값"""
+        with self._shards_lock:
+            totals = self._merge({}, self._retired)
+            shards = list(self._shards)
+        for shard in shards:
+            self._merge(totals, shard)
+        return totals
+
+    def samples(self):
+        return sorted(self._totals().items())
+
+
+class Counter(_ThreadSharded):
+    kind = "counter"
+
+    def inc(self, *labels, value=1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + value
+
+    def _combine(self, total, value):
+        return _add_counter(total, value)
+
+    def collect(self, samples=None, labelnames=None):
+        labelnames = self.labelnames if labelnames is None else labelnames
+        for labels, value in self.samples() if samples is None else samples:
+            yield f"{self.name}{_format_labels(labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram(_ThreadSharded):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        shard = self._shard()
+        data = shard.get(labels)
+        if data is None:
+            # [버킷별 개수..., +Inf 개수, 합계]
+            data = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        data[bisect_left(self.buckets, value)] += 1
+        data[-1] += value
+
+    def _combine(self, total, value):
+        return _add_histogram(total, value)
+
+    def collect(self, samples=None, labelnames=None):
+        labelnames = self.labelnames if labelnames is None else labelnames
+        for labels, data in self.samples() if samples is None else samples:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), data[:-1]):
+                cumulative += count
+                bucket_labels = _format_labels(labelnames + ("le",), labels + (_format_value(bound),))
+                yield f"{self.name}_bucket{bucket_labels} {cumulative}"
+            label_text = _format_labels(labelnames, labels)
+            yield f"{self.name}_sum{label_text} {_format_value(data[-1])}"
+            yield f"{self.name}_count{label_text} {cumulative}"
+
+
+class Gauge:
+    """수집 시점에 callback()을 호출. callback은 숫자 또는 [(labels 튜플, 값)] 반환"""
+    kind = "gauge"
+
+    def __init__(self, name, help_text, callback, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.callback = callback
+        self.labelnames = tuple(labelnames)
+
+    def samples(self):
+        try:
+            values = self.callback()
+        except Exception:
+            return []
+        if values is None:
+            return []
+        if isinstance(values, (int, float)):
+            values = [((), values)]
+        return list(values)
+
+    def collect(self, samples=None, labelnames=None):
+        labelnames = self.labelnames if labelnames is None else labelnames
+        for labels, value in self.samples() if samples is None else samples:
+            yield f"{self.name}{_format_labels(labelnames, labels)} {_format_value(value)}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._sections = {}  # 스냅숏에 함께 싣는 워커별 통계 (이름 -> 콜백, 예: /cache-stats)
+        self.directory = None  # 멀티 워커 집계용 공유 디렉터리 (enable_multiprocess)
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self.register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def gauge(self, name, help_text, callback, labelnames=()):
+        return self.register(Gauge(name, help_text, callback, labelnames))
+
+    def section(self, name, callback):
+        """callback() 결과(JSON 직렬화 가능)를 스냅숏에 실어 worker_sections(name)으로 워커별 조회"""
+        self._sections[name] = callback
+
+    def render(self):
+        if self.directory is not None:
+            return self._render_aggregate()
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+    # -----------------------
+    # 멀티 워커 집계
+    # -----------------------
+    def enable_multiprocess(self, directory, interval=5.0):
+        """이 워커의 스냅숏을 interval초마다(그리고 수집/종료 시) directory/{pid}.json에 기록"""
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.write_snapshot()
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.write_snapshot()
+                except OSError:
+                    pass
+
+        threading.Thread(target=run, name="metrics-snapshot", daemon=True).start()
+        atexit.register(self.write_snapshot)
+
+    def snapshot(self):
+        return {
+            "metrics": {
+                metric.name: {"kind": metric.kind, "samples": metric.samples()} for metric in self._metrics
+            },
+            "sections": {name: _call_section(callback) for name, callback in self._sections.items()},
+        }
+
+    def write_snapshot(self):
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        _write_json(path, self.snapshot())
+
+    def _snapshots(self):
+        """(pid, 스냅숏) 목록 - 이 워커는 최신 값으로 다시 기록한 뒤 읽는다"""
+        self.write_snapshot()
+        snapshots = []
+        for filename in sorted(os.listdir(self.directory)):
+            stem, ext = os.path.splitext(filename)
+            if ext != ".json" or not (stem.isdigit() or stem == RETIRED):
+                continue
+            data = _read_json(os.path.join(self.directory, filename))
+            if data is not None:
+                snapshots.append((stem, data))
+        return snapshots
+
+    def worker_sections(self, name):
+        """워커별 section(name) 값 {pid: 값} (멀티 워커 집계를 쓰지 않으면 이 워커만)"""
+        if self.directory is None:
+            callback = self._sections.get(name)
+            return {str(os.getpid()): _call_section(callback)} if callback else {}
+        return {
+            pid: data.get("sections", {}).get(name)
+            for pid, data in self._snapshots() if pid != RETIRED
+        }
+
+    def _render_aggregate(self):
+        snapshots = self._snapshots()
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            if isinstance(metric, Gauge):
+                samples = [
+                    (tuple(labels) + (pid,), value)
+                    for pid, data in snapshots if pid != RETIRED
+                    for labels, value in _samples(data, metric.name)
+                ]
+                lines.extend(metric.collect(samples, metric.labelnames + ("pid",)))
+            else:
+                totals = {}
+                for _pid, data in snapshots:
+                    _merge_samples(totals, metric.kind, _samples(data, metric.name))
+                lines.extend(metric.collect(sorted(totals.items(), key=_sample_key)))
+        return "\n".join(lines) + "\n"
+
+
+# 종료된 워커들의 카운터/히스토그램 누적 파일 이름
+RETIRED = "retired"
+
+
+def _call_section(callback):
+    try:
+        return callback()
+    except Exception:
+        return None
+
+
+def _samples(snapshot, name):
+    return snapshot["metrics"].get(name, {}).get("samples", [])
+
+
+def _merge_samples(totals, kind, samples):
+    combine = _COMBINE[kind]
+    for labels, value in samples:
+        key = tuple(labels)
+        totals[key] = combine(totals.get(key), value)
+    return totals
+
+
+def _sample_key(item):
+    return tuple(str(label) for label in item[0])
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    """임시 파일에 쓴 뒤 교체 -> 읽는 쪽이 쓰다 만 파일을 보지 않음"""
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def retire_process(directory, pid):
+    """
+    종료된 워커의 스냅숏을 정리 (gunicorn 마스터의 child_exit 훅에서 호출).
+    카운터/히스토그램은 retired.json에 더해 합계가 줄어들지 않게 하고, 게이지는 버린다.
+    """
+    path = os.path.join(directory, f"{pid}.json")
+    data = _read_json(path)
+    if data is None:
+        return
+    retired_path = os.path.join(directory, f"{RETIRED}.json")
+    retired = _read_json(retired_path) or {"metrics": {}}
+    for name, metric in data["metrics"].items():
+        if metric["kind"] not in _COMBINE:
+            continue
+        totals = _merge_samples({}, metric["kind"], _samples(retired, name))
+        _merge_samples(totals, metric["kind"], metric["samples"])
+        retired["metrics"][name] = {
+            "kind": metric["kind"],
+            "samples": [[list(labels), value] for labels, value in totals.items()],
+        }
+    _write_json(retired_path, retired)
+    os.remove(path)
+
+
+REGISTRY = Registry()
+
+# -----------------------
+# 공용 메트릭
+# -----------------------
+REQUEST_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("route", "method", "status")
+)
+DB_QUERY_LATENCY = REGISTRY.histogram(
+    "db_query_duration_seconds", "SQL statement execution time by engine and statement type",
+    ("engine", "statement"),
+)
+DB_POOL_WAIT = REGISTRY.histogram(
+    "db_pool_wait_seconds", "Time spent acquiring a connection from the pool", ("engine",)
+)
+JOB_DURATION = REGISTRY.histogram(
+    "scheduler_job_duration_seconds", "APScheduler job run time", ("job",),
+    buckets=(0.01, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+JOB_FAILURES = REGISTRY.counter("scheduler_job_failures_total", "APScheduler job failures", ("job",))
+
+# instrument_engine으로 등록된 (이름, 엔진) - 풀 상태 게이지 하나에서 모두 보고
+_ENGINES = []
+
+
+def _pool_stats():
+    stats = []
+    for name, engine in _ENGINES:
+        pool = engine.pool
+        for stat in ("size", "checkedout", "overflow", "checkedin"):
+            method = getattr(pool, stat, None)
+            if callable(method):
+                stats.append(((name, stat), method()))
+    return stats
+
+
+REGISTRY.gauge("db_pool_connections", "Connection pool state", _pool_stats, ("engine", "state"))
+
+
+def instrument_engine(engine, name):
+    """SQLAlchemy 엔진에 쿼리 시간/풀 대기 시간 측정과 풀 상태 게이지를 연결"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info["metrics_query_start"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("metrics_query_start", None)
+        if started is not None:
+            verb = statement.lstrip()[:6].upper()
+            DB_QUERY_LATENCY.observe(time.perf_counter() - started, name, verb)
+
+    # 커넥션 획득(풀 대기 포함) 시간 측정
+    raw_connection = engine.raw_connection
+
+    def timed_raw_connection(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return raw_connection(*args, **kwargs)
+        finally:
+            DB_POOL_WAIT.observe(time.perf_counter() - started, name)
+
+    engine.raw_connection = timed_raw_connection
+
+    _ENGINES.append((name, engine))
+
+
+def timed_job(name, func):
+    """APScheduler 작업 실행 시간/실패 횟수 기록용 래퍼"""
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            JOB_FAILURES.inc(name)
+            raise
+        finally:
+            JOB_DURATION.observe(time.perf_counter() - started, name)
+
+    return wrapper
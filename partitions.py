@@ -0,0 +1,300 @@
+# partitions.py
+"""
+PostgreSQL 기간(RANGE) 파티션 생성/보관/삭제 (로그 테이블 보존 정책용)
+- 파티션 생성(CREATE ... PARTITION OF)과 분리(DETACH)는 부모 테이블에 ACCESS EXCLUSIVE 락을 잡으므로,
+  파티션마다 짧은 트랜잭션으로 나누고 lock_timeout을 걸어 INSERT가 오래 막히지 않게 한다.
+  (락을 못 잡으면 건너뛰고 다음 실행 때 다시 시도)
+- 보관(COPY TO)은 파티션만 읽으므로 분리 전에 별도 트랜잭션에서 실행한다.
+- 기존 일반 테이블은 convert_to_partitioned()로 파티션 부모 아래의 과거 파티션({table}_legacy)으로 옮길 수 있다.
+"""
+import gzip
+import logging
+import os
+import re
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Index, MetaData, Table, text
+from sqlalchemy.exc import DBAPIError, OperationalError
+
+logger = logging.getLogger(__name__)
+
+INTERVAL_DAY = "day"
+INTERVAL_MONTH = "month"
+
+
+# -----------------------
+# 파티션 범위 계산
+# -----------------------
+def period_start(moment, interval):
+    """moment가 속한 파티션 구간의 시작 (UTC)"""
+    moment = moment.astimezone(timezone.utc)
+    if interval == INTERVAL_DAY:
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_period(start, interval):
+    if interval == INTERVAL_DAY:
+        return start + timedelta(days=1)
+    return (start + timedelta(days=32)).replace(day=1)
+
+
+def partition_name(table_name, start, interval):
+    suffix = start.strftime("%Y%m%d" if interval == INTERVAL_DAY else "%Y%m")
+    return f"{table_name}_p{suffix}"
+
+
+def legacy_partition_name(table_name):
+    """일반 테이블에서 전환된 과거 파티션 이름 (MINVALUE ~ 전환 시점 구간)"""
+    return f"{table_name}_legacy"
+
+
+def parse_partition_start(table_name, name):
+    """파티션 이름에서 구간 시작 시각을 복원 (규칙에 맞지 않으면 None)"""
+    prefix = f"{table_name}_p"
+    if not name.startswith(prefix):
+        return None
+    suffix = name[len(prefix):]
+    formats = {8: ("%Y%m%d", INTERVAL_DAY), 6: ("%Y%m", INTERVAL_MONTH)}
+    if not suffix.isdigit() or len(suffix) not in formats:
+        return None
+    fmt, interval = formats[len(suffix)]
+    try:
+        return datetime.strptime(suffix, fmt).replace(tzinfo=timezone.utc), interval
+    except ValueError:
+        return None
+
+
+# -----------------------
+# 테이블/파티션 생성
+# -----------------------
+def partitioned_table(table, key_column):
+    """
+    ORM 테이블 정의를 복사해 RANGE 파티션 테이블 정의를 만든다.
+    PostgreSQL은 기본 키에 파티션 키가 포함되어야 하므로 (id, key_column)을 기본 키로 사용한다.
+    """
+    metadata = MetaData()
+    columns = []
+    for column in table.columns:
+        copy = column._copy()
+        copy.index = None  # 인덱스는 아래에서 한 번에 다시 만든다
+        if column.name == key_column:
+            copy.primary_key = True
+            copy.nullable = False
+        columns.append(copy)
+    new_table = Table(
+        table.name, metadata, *columns,
+        postgresql_partition_by=f"RANGE ({key_column})",
+    )
+    for index in table.indexes:
+        Index(index.name, *[new_table.c[column.name] for column in index.columns], unique=index.unique)
+    return new_table
+
+
+def is_partitioned(conn, table_name):
+    return conn.execute(
+        text("SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :name"),
+        {"name": table_name},
+    ).first() is not None
+
+
+def table_exists(conn, table_name):
+    return conn.execute(text("SELECT to_regclass(:name)"), {"name": table_name}).scalar() is not None
+
+
+def ensure_partitioned_table(conn, table, key_column):
+    """테이블이 없으면 파티션 테이블(+DEFAULT 파티션)로 생성. 기존 일반 테이블은 그대로 둔다."""
+    if table_exists(conn, table.name):
+        if not is_partitioned(conn, table.name):
+            logger.warning(
+                "%s 테이블이 이미 일반 테이블로 존재합니다. 파티션으로 전환하려면 flask --app app partition-tables 를 실행하세요.",
+                table.name,
+            )
+            return False
+        return True
+
+    partitioned_table(table, key_column).create(bind=conn)
+    # 범위를 벗어난 행(예: 과거 발송 기록)을 받아 줄 기본 파티션
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {table.name}_default PARTITION OF {table.name} DEFAULT"))
+    logger.info("파티션 테이블 생성: %s (RANGE %s)", table.name, key_column)
+    return True
+
+
+def partition_upper_bound(conn, name):
+    """파티션 구간의 끝 (UTC datetime, 파티션이 아니거나 상한이 없으면 None)"""
+    expr = conn.execute(
+        text("SELECT pg_get_expr(c.relpartbound, c.oid) FROM pg_class c WHERE c.relname = :name AND c.relispartition"),
+        {"name": name},
+    ).scalar()
+    match = re.search(r"TO \('([^']+)'\)", expr or "")
+    if match is None:
+        return None
+    value = match.group(1)
+    if re.search(r"[+-]\d\d$", value):
+        value += ":00"  # "+00" -> "+00:00" (fromisoformat 호환)
+    bound = datetime.fromisoformat(value)
+    return bound if bound.tzinfo else bound.replace(tzinfo=timezone.utc)
+
+
+def set_lock_timeout(conn, lock_timeout_ms):
+    """현재 트랜잭션의 락 대기 시간 제한 (대기 중인 DDL이 뒤따르는 INSERT까지 막지 않도록)"""
+    conn.execute(text(f"SET LOCAL lock_timeout = {int(lock_timeout_ms)}"))
+
+
+def ensure_partitions(engine, table_name, interval, ahead, now=None, lock_timeout_ms=5000):
+    """현재 구간부터 ahead 개 구간 뒤까지의 파티션을 미리 생성 (파티션마다 별도 트랜잭션)"""
+    start = period_start(now or datetime.now(timezone.utc), interval)
+    # 전환된 과거 파티션이 이미 덮고 있는 구간은 만들지 않음
+    with engine.connect() as conn:
+        covered_until = partition_upper_bound(conn, legacy_partition_name(table_name))
+    created = []
+    for _ in range(ahead + 1):
+        end = next_period(start, interval)
+        name = partition_name(table_name, start, interval)
+        if covered_until is not None and start < covered_until:
+            start = end
+            continue
+        try:
+            with engine.begin() as conn:
+                # 이미 있으면 부모 테이블 락 없이 넘어감
+                if not table_exists(conn, name):
+                    set_lock_timeout(conn, lock_timeout_ms)
+                    # timestamp(without time zone) 컬럼에서는 오프셋이 무시되어 UTC 값 그대로 사용된다
+                    conn.execute(text(
+                        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table_name} "
+                        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                    ))
+                    created.append(name)
+        except OperationalError as e:
+            logger.warning("파티션 생성 보류 (락 대기 시간 초과 등): %s - %s", name, e)
+        except DBAPIError as e:
+            # DEFAULT 파티션에 이미 이 구간의 행이 있으면 check 위반 - 나머지 파티션/테이블은 계속 처리
+            logger.error("파티션 생성 실패: %s - %s", name, e)
+        start = end
+    return created
+
+
+def list_partitions(conn, table_name):
+    rows = conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :name ORDER BY c.relname"
+        ),
+        {"name": table_name},
+    )
+    return [row[0] for row in rows]
+
+
+# -----------------------
+# 보존 기간 만료 처리
+# -----------------------
+def archive_partition(conn, name, archive_dir):
+    """파티션 내용을 gzip CSV 파일로 보관"""
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{name}.csv.gz")
+    cursor = conn.connection.cursor()
+    try:
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            cursor.copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)", f)
+    finally:
+        cursor.close()
+    return path
+
+
+def expire_partitions(engine, table_name, retention_days, archive_dir=None, now=None, lock_timeout_ms=5000):
+    """
+    구간 끝이 보존 기간보다 오래된 파티션을 (보관 후) 분리/삭제.
+    대량 DELETE 대신 메타데이터 작업으로 처리된다.
+    """
+    cutoff = (now or datetime.now(timezone.utc)) - timedelta(days=retention_days)
+    with engine.connect() as conn:
+        names = list_partitions(conn, table_name)
+        legacy_end = partition_upper_bound(conn, legacy_partition_name(table_name))
+    expired = []
+    for name in names:
+        if name == legacy_partition_name(table_name):
+            end = legacy_end  # 전환된 과거 파티션은 구간 끝이 보존 기간을 지나면 통째로 삭제
+        else:
+            parsed = parse_partition_start(table_name, name)
+            if parsed is None:
+                continue  # DEFAULT 파티션 등
+            start, interval = parsed
+            end = next_period(start, interval)
+        if end is None or end > cutoff:
+            continue
+        if archive_dir:
+            # 보관은 파티션만 읽는 별도 트랜잭션 (부모 테이블은 잠그지 않음)
+            with engine.begin() as conn:
+                path = archive_partition(conn, name, archive_dir)
+            logger.info("파티션 보관: %s -> %s", name, path)
+        try:
+            with engine.begin() as conn:
+                set_lock_timeout(conn, lock_timeout_ms)
+                conn.execute(text(f"ALTER TABLE {table_name} DETACH PARTITION {name}"))
+                conn.execute(text(f"DROP TABLE {name}"))
+        except OperationalError as e:
+            logger.warning("만료 파티션 분리 보류 (다음 실행 때 재시도): %s - %s", name, e)
+            continue
+        logger.info("만료 파티션 삭제: %s", name)
+        expired.append(name)
+    return expired
+
+
+# -----------------------
+# 기존 일반 테이블 전환
+# -----------------------
+def convert_to_partitioned(engine, table, key_column, interval, now=None, lock_timeout_ms=5000):
+    """
+    기존 일반 테이블을 파티션 테이블로 전환. 기존 테이블은 {table}_legacy 이름으로
+    (MINVALUE ~ 다음 구간의 끝) 과거 파티션으로 붙이고, 이후 행은 새 기간 파티션에 저장된다.
+    오래 걸리는 작업(CHECK 제약 검증, (id, 키) 유니크 인덱스)은 쓰기를 막지 않는 방식으로 먼저 하고,
+    이름 변경/부모 생성/ATTACH만 짧은 트랜잭션에서 실행한다. 반환: 전환했으면 True
+    """
+    name = table.name
+    legacy = legacy_partition_name(name)
+    with engine.connect() as conn:
+        if not table_exists(conn, name) or is_partitioned(conn, name):
+            return False
+
+    # 전환 도중 구간이 바뀌어도 새 행이 CHECK에 걸리지 않도록 다음 구간까지 과거 파티션에 포함
+    current = period_start(now or datetime.now(timezone.utc), interval)
+    upper = next_period(next_period(current, interval), interval)
+    constraint = f"{name}_partition_bound"
+    key_index = f"{name}_id_key_idx"
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        # NOT VALID로 추가 후 VALIDATE (검증 중에도 INSERT 가능) -> ATTACH 때 전체 스캔 생략
+        conn.execute(text(f"ALTER TABLE {name} DROP CONSTRAINT IF EXISTS {constraint}"))
+        conn.execute(text(
+            f'ALTER TABLE {name} ADD CONSTRAINT {constraint} '
+            f"CHECK (\"{key_column}\" IS NOT NULL AND \"{key_column}\" < '{upper.isoformat()}') NOT VALID"
+        ))
+        conn.execute(text(f"ALTER TABLE {name} VALIDATE CONSTRAINT {constraint}"))
+        # 부모의 기본 키 (id, 키)에 붙일 인덱스를 미리 만들어 둠
+        conn.execute(text(
+            f'CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {key_index} ON {name} (id, "{key_column}")'
+        ))
+
+    with engine.begin() as conn:
+        set_lock_timeout(conn, lock_timeout_ms)
+        conn.execute(text(f"ALTER TABLE {name} RENAME TO {legacy}"))
+        # 인덱스 이름은 스키마 안에서 유일해야 하므로 새 부모 테이블과 겹치지 않게 변경
+        index_names = conn.execute(
+            text("SELECT indexname FROM pg_indexes WHERE tablename = :name"), {"name": legacy}
+        ).scalars().all()
+        for index_name in index_names:
+            if index_name != key_index:
+                conn.execute(text(f'ALTER INDEX "{index_name}" RENAME TO "{(index_name + "_legacy")[:63]}"'))
+        ensure_partitioned_table(conn, table, key_column)
+        conn.execute(text(
+            f"ALTER TABLE {name} ATTACH PARTITION {legacy} FOR VALUES FROM (MINVALUE) TO ('{upper.isoformat()}')"
+        ))
+        # 새 부모의 id 시퀀스를 기존 id 이후부터 시작 (키셋 페이지/실시간 피드가 id 순서를 사용)
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), "
+            f"(SELECT COALESCE(MAX(id), 0) + 1 FROM {legacy}), false)"
+        ))
+    logger.info("일반 테이블을 파티션 테이블로 전환: %s (과거 행 -> %s, ~%s)", name, legacy, upper.isoformat())
+    return True
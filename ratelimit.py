@@ -0,0 +1,57 @@
+# ratelimit.py
+"""프로세스 내 토큰 버킷 요청 제한 (키별 버킷, 키 개수는 LRU로 제한)"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucketLimiter:
+    """
+    키마다 최대 burst 개의 토큰을 두고 초당 rate 개씩 채운다. 요청 하나에 토큰 하나.
+    버킷은 최대 max_keys 개까지 보관하며, 오래 안 쓰인 키부터 제거한다
+    (제거된 키는 다음 요청 때 가득 찬 버킷으로 다시 시작).
+    """
+
+    def __init__(self, rate, burst, max_keys=100000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> [남은 토큰, 마지막 갱신 시각]
+        self._lock = threading.Lock()
+
+        # 통계 카운터
+        self.allowed = 0
+        self.limited = 0
+        self.evictions = 0
+
+    def allow(self, key):
+        """토큰이 있으면 하나 쓰고 True, 없으면 False"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [self.burst, now]
+                while len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+                    self.evictions += 1
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] >= 1:
+                bucket[0] -= 1
+                self.allowed += 1
+                return True
+            self.limited += 1
+            return False
+
+    def stats(self):
+        return {
+            "size": len(self._buckets),
+            "max_keys": self.max_keys,
+            "rate": self.rate,
+            "burst": self.burst,
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "evictions": self.evictions,
+        }
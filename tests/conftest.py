@@ -0,0 +1,5 @@
+import os
+import sys
+
+# 최상위 모듈(app.py, write_behind.py 등)을 import 할 수 있도록
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,108 @@
+import json
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+import write_behind
+from write_behind import OpenEventBuffer
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(write_behind, "SPILL_RETRY_DELAY", 0)
+
+
+def event(i):
+    return {"email": f"user{i}@example.com", "timestamp": datetime(2024, 1, 1, tzinfo=timezone.utc)}
+
+
+def make_buffer(tmp_path, flush_func):
+    return OpenEventBuffer(flush_func, batch_size=10, flush_interval=0.05,
+                           policy="spill", spill_path=str(tmp_path / "spill.jsonl"))
+
+
+def test_failed_batch_is_spilled_and_replayed(tmp_path):
+    saved = []
+    fail = [True]
+
+    def flush(rows):
+        if fail[0]:
+            raise RuntimeError("db down")
+        saved.extend(rows)
+
+    buffer = make_buffer(tmp_path, flush)
+    for i in range(3):
+        buffer._queue.put(event(i))
+    buffer.flush()
+    assert saved == []
+    assert len((tmp_path / "spill.jsonl").read_text(encoding="utf-8").splitlines()) == 3
+
+    fail[0] = False
+    buffer._replay_spill()
+    assert [row["email"] for row in saved] == [f"user{i}@example.com" for i in range(3)]
+    assert saved[0]["timestamp"] == datetime(2024, 1, 1, tzinfo=timezone.utc)
+    assert not (tmp_path / "spill.jsonl").exists()
+    assert not (tmp_path / "spill.jsonl.replay").exists()
+
+
+def test_truncated_line_is_quarantined(tmp_path):
+    saved = []
+    spill = tmp_path / "spill.jsonl"
+    good = json.dumps({"email": "ok@example.com"})
+    spill.write_text(good + "\n" + '{"email": "cut', encoding="utf-8")
+
+    buffer = make_buffer(tmp_path, saved.extend)
+    buffer._replay_spill()
+
+    assert saved == [{"email": "ok@example.com"}]
+    assert buffer.bad_lines == 1
+    assert (tmp_path / "spill.jsonl.bad").read_text(encoding="utf-8") == '{"email": "cut\n'
+
+
+def test_flusher_survives_replay_error(tmp_path, monkeypatch):
+    saved = []
+    buffer = make_buffer(tmp_path, saved.extend)
+    calls = []
+
+    def broken_replay():
+        calls.append(1)
+        if len(calls) == 1:
+            raise OSError("disk error")
+
+    monkeypatch.setattr(buffer, "_replay_spill", broken_replay)
+    buffer.start()
+    deadline = time.monotonic() + 2
+    while len(calls) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    buffer.put(event(1))
+    deadline = time.monotonic() + 2
+    while not saved and time.monotonic() < deadline:
+        time.sleep(0.01)
+    buffer.stop()
+
+    assert len(calls) >= 2
+    assert [row["email"] for row in saved] == ["user1@example.com"]
+
+
+def test_concurrent_replay_inserts_once(tmp_path):
+    saved = []
+    lock = threading.Lock()
+
+    def flush(rows):
+        with lock:
+            saved.extend(rows)
+
+    spill = tmp_path / "spill.jsonl"
+    spill.write_text("".join(json.dumps({"email": f"u{i}"}) + "\n" for i in range(100)), encoding="utf-8")
+
+    # 같은 spill 파일을 쓰는 두 프로세스를 두 버퍼로 흉내
+    buffers = [make_buffer(tmp_path, flush) for _ in range(2)]
+    threads = [threading.Thread(target=buffer._replay_spill) for buffer in buffers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(row["email"] for row in saved) == sorted(f"u{i}" for i in range(100))
@@ -0,0 +1,46 @@
+# tokens.py
+"""발송 기록(EmailSendLog.id)을 가리키는 서명된 트래킹 토큰"""
+import base64
+import hashlib
+import hmac
+
+
+def _b64encode(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+class TokenSigner:
+    """
+    토큰 = base64url(발송 id 바이트 + HMAC-SHA256 앞부분).
+    검증은 메모리에서만 이루어지며, 위조/변조된 토큰은 None을 반환한다.
+    """
+
+    def __init__(self, secret, mac_size=10):
+        if isinstance(secret, str):
+            secret = secret.encode("utf-8")
+        self.secret = secret
+        self.mac_size = mac_size
+
+    def _mac(self, id_bytes):
+        return hmac.new(self.secret, id_bytes, hashlib.sha256).digest()[:self.mac_size]
+
+    def sign(self, send_id):
+        id_bytes = send_id.to_bytes((send_id.bit_length() + 7) // 8 or 1, "big")
+        return _b64encode(id_bytes + self._mac(id_bytes))
+
+    def verify(self, token):
+        """유효하면 발송 id, 아니면 None"""
+        try:
+            raw = _b64decode(token)
+        except (ValueError, TypeError):
+            return None
+        id_bytes, mac = raw[:-self.mac_size], raw[-self.mac_size:]
+        if not id_bytes or len(id_bytes) > 8:
+            return None
+        if not hmac.compare_digest(mac, self._mac(id_bytes)):
+            return None
+        return int.from_bytes(id_bytes, "big")
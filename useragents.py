@@ -0,0 +1,76 @@
+# useragents.py
+"""
+User-Agent 문자열 분류 (메일 클라이언트 / 기기 / OS / 이미지 프록시 / 봇)
+- 정규식 몇 개로 대략 분류하며, 같은 문자열은 한 번만 파싱한다 (lru_cache).
+"""
+import re
+from functools import lru_cache
+
+# (패턴, 클라이언트 이름, 이미지 프록시 여부) - 위에서부터 먼저 맞는 것 사용
+CLIENT_RULES = (
+    (re.compile(r"GoogleImageProxy", re.I), "Gmail", True),
+    # Apple Mail 개인정보 보호(MPP) 프록시는 버전 없는 "Mozilla/5.0"만 보냄
+    (re.compile(r"^Mozilla/5\.0$"), "Apple Mail", True),
+    (re.compile(r"YahooMailProxy", re.I), "Yahoo Mail", True),
+    (re.compile(r"Outlook-iOS|Outlook-Android|Microsoft Outlook|ms-office|MSOffice", re.I), "Outlook", False),
+    (re.compile(r"Thunderbird", re.I), "Thunderbird", False),
+    (re.compile(r"NAVER\(inapp|NaverMail", re.I), "Naver Mail", False),
+    (re.compile(r"Edg/", re.I), "Edge", False),
+    (re.compile(r"Whale/", re.I), "Whale", False),
+    (re.compile(r"Chrome/|CriOS/", re.I), "Chrome", False),
+    (re.compile(r"Firefox/|FxiOS/", re.I), "Firefox", False),
+    (re.compile(r"Version/[\d.]+.*Safari/", re.I), "Safari", False),
+    # 버전 정보 없는 WebKit UA = Apple Mail (개인정보 보호 프록시 포함)
+    (re.compile(r"AppleWebKit/[\d.]+ \(KHTML, like Gecko\)$", re.I), "Apple Mail", False),
+)
+
+OS_RULES = (
+    (re.compile(r"iPhone|iPad|iPod|iOS", re.I), "iOS"),
+    (re.compile(r"Android", re.I), "Android"),
+    (re.compile(r"Windows", re.I), "Windows"),
+    (re.compile(r"Mac OS X|Macintosh", re.I), "macOS"),
+    (re.compile(r"CrOS", re.I), "ChromeOS"),
+    (re.compile(r"Linux", re.I), "Linux"),
+)
+
+# 보안 스캐너/크롤러/스크립트 - 사람이 연 것이 아님
+BOT_PATTERN = re.compile(
+    r"\bbot\b|bot/|crawler|spider|scanner|preview|curl/|wget/|python-requests|python-urllib|aiohttp|httpx|"
+    r"go-http-client|java/|headless|phantomjs|barracuda|mimecast|proofpoint|symantec|"
+    r"forcepoint|trendmicro|cisco|fireeye",
+    re.I,
+)
+
+
+@lru_cache(maxsize=4096)
+def parse_user_agent(user_agent):
+    """User-Agent -> {client, device, os, is_proxy, is_bot}"""
+    user_agent = user_agent or ""
+    client, is_proxy = None, False
+    for pattern, name, proxy in CLIENT_RULES:
+        if pattern.search(user_agent):
+            client, is_proxy = name, proxy
+            break
+
+    os_name = next((name for pattern, name in OS_RULES if pattern.search(user_agent)), None)
+
+    if re.search(r"iPad|Tablet", user_agent, re.I):
+        device = "tablet"
+    elif re.search(r"Mobile|iPhone|Android", user_agent, re.I):
+        device = "mobile"
+    elif os_name in ("Windows", "macOS", "Linux", "ChromeOS"):
+        device = "desktop"
+    else:
+        device = None
+
+    return {
+        "client": client or ("Unknown" if user_agent else None),
+        "device": device,
+        "os": os_name,
+        "is_proxy": is_proxy,
+        "is_bot": not is_proxy and bool(BOT_PATTERN.search(user_agent)),
+    }
+
+
+def is_bot(user_agent):
+    return parse_user_agent(user_agent)["is_bot"]
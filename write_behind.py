@@ -0,0 +1,238 @@
+# write_behind.py
+"""열람 이벤트 write-behind 버퍼 (메모리 큐 -> 백그라운드 일괄 INSERT)"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# 큐가 가득 찼을 때의 처리 정책
+POLICY_BLOCK = "block"   # 자리가 날 때까지 대기 (block_timeout 초과 시 버림)
+POLICY_DROP = "drop"     # 즉시 버림
+POLICY_SPILL = "spill"   # 로컬 파일에 기록 후 나중에 재처리
+POLICIES = (POLICY_BLOCK, POLICY_DROP, POLICY_SPILL)
+
+# spill 파일 재처리 전 최소 대기 시간(초)
+SPILL_RETRY_DELAY = 30.0
+
+
+def _encode(value):
+    """datetime을 JSON으로 직렬화 (spill 파일용)"""
+    if isinstance(value, datetime):
+        return {"__dt__": value.isoformat()}
+    raise TypeError(f"직렬화할 수 없는 타입: {type(value)}")
+
+
+def _decode(obj):
+    if "__dt__" in obj:
+        return datetime.fromisoformat(obj["__dt__"])
+    return obj
+
+
+class OpenEventBuffer:
+    """
+    열람 이벤트를 제한된 크기의 큐에 쌓아 두고, 백그라운드 스레드가
+    batch_size 개가 모이거나 flush_interval 초가 지나면 flush_func(rows)로 일괄 저장한다.
+    """
+
+    def __init__(self, flush_func, max_size=10000, batch_size=500, flush_interval=1.0,
+                 policy=POLICY_BLOCK, block_timeout=5.0, spill_path=None):
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}: {policy}")
+        if policy == POLICY_SPILL and not spill_path:
+            raise ValueError("spill 정책에는 spill_path가 필요합니다.")
+
+        self.flush_func = flush_func
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.spill_path = spill_path
+
+        self._queue = queue.Queue(maxsize=max_size)
+        self._stop = threading.Event()
+        self._spill_lock = threading.Lock()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+        # 통계 카운터
+        self.enqueued = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.flushed = 0
+        self.failed_batches = 0
+        self.bad_lines = 0
+        self._last_failure = None
+
+    # ---------- 생산자 측 ----------
+    def put(self, event):
+        """이벤트를 큐에 넣는다. 버려진 경우 False 반환"""
+        self.start()
+        try:
+            if self.policy == POLICY_BLOCK:
+                self._queue.put(event, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(event)
+            self.enqueued += 1
+            return True
+        except queue.Full:
+            if self.policy == POLICY_SPILL:
+                self._spill([event])
+                return True
+            self.dropped += 1
+            logger.warning("write-behind 큐가 가득 차 이벤트를 버렸습니다. (dropped=%d)", self.dropped)
+            return False
+
+    def qsize(self):
+        return self._queue.qsize()
+
+    # ---------- 소비자 측 ----------
+    def start(self):
+        """플러셔 스레드를 (한 번만) 시작"""
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="open-event-flusher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            # 예외로 스레드가 죽으면 이후 이벤트가 큐에 영원히 남으므로 기록만 하고 계속
+            try:
+                batch = self._collect()
+                if batch:
+                    self._flush(batch)
+                elif self.spill_path:
+                    self._replay_spill()
+            except Exception:
+                logger.exception("write-behind 플러셔 오류")
+                self._stop.wait(self.flush_interval)
+        # 종료 시 남은 이벤트를 모두 저장
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("종료 시 남은 이벤트 저장 실패")
+
+    def _collect(self):
+        """batch_size 개 또는 flush_interval 초까지 이벤트를 모은다"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stop.is_set():
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _drain(self):
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch):
+        try:
+            self.flush_func(batch)
+            self.flushed += len(batch)
+        except Exception as e:
+            self.failed_batches += 1
+            self._last_failure = time.monotonic()
+            if self.spill_path:
+                logger.error("일괄 저장 실패, spill 파일로 이동: %s", e)
+                self._spill(batch)
+            else:
+                logger.error("일괄 저장 실패, %d개 이벤트 유실: %s", len(batch), e)
+
+    def flush(self):
+        """큐에 남은 이벤트를 호출 스레드에서 즉시 저장"""
+        while True:
+            batch = self._drain()
+            if not batch:
+                break
+            self._flush(batch)
+        if self.spill_path:
+            self._replay_spill()
+
+    def stop(self, timeout=10.0):
+        """플러셔를 멈추고 남은 이벤트를 저장 (프로세스 종료 시 호출)"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        else:
+            self.flush()
+
+    # ---------- spill 파일 ----------
+    @contextmanager
+    def _locked_spill(self):
+        """spill 파일 접근 락 (스레드 간 + 같은 파일을 쓰는 다른 프로세스 간 fcntl 락)"""
+        import fcntl
+
+        with self._spill_lock, open(self.spill_path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _spill(self, events):
+        with self._locked_spill():
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                for event in events:
+                    f.write(json.dumps(event, default=_encode, ensure_ascii=False) + "\n")
+            self.spilled += len(events)
+
+    def _replay_spill(self):
+        """spill 파일에 쌓인 이벤트를 다시 저장 시도"""
+        # 저장 실패 직후에는 DB가 회복될 때까지 재시도를 미룬다
+        if self._last_failure is not None and time.monotonic() - self._last_failure < SPILL_RETRY_DELAY:
+            return
+        replay_path = self.spill_path + ".replay"
+        # 파일 교체/읽기/삭제를 락 안에서 처리 -> 여러 프로세스가 같은 파일을 두 번 재처리하지 않음
+        batch, bad = [], []
+        with self._locked_spill():
+            if not os.path.exists(replay_path):
+                if not os.path.exists(self.spill_path):
+                    return
+                os.replace(self.spill_path, replay_path)
+            with open(replay_path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        batch.append(json.loads(line, object_hook=_decode))
+                    except ValueError:  # 기록 중 종료되어 잘린 줄 등
+                        bad.append(line if line.endswith("\n") else line + "\n")
+            if bad:
+                # 깨진 줄은 따로 보관하고 나머지만 재처리
+                with open(self.spill_path + ".bad", "a", encoding="utf-8") as f:
+                    f.writelines(bad)
+                self.bad_lines += len(bad)
+                logger.error("spill 파일의 깨진 줄 %d개를 %s.bad로 옮겼습니다.", len(bad), self.spill_path)
+            os.remove(replay_path)
+
+        for i in range(0, len(batch), self.batch_size):
+            self._flush(batch[i:i + self.batch_size])
+
+    def stats(self):
+        return {
+            "policy": self.policy,
+            "depth": self.qsize(),
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "spilled": self.spilled,
+            "flushed": self.flushed,
+            "failed_batches": self.failed_batches,
+            "bad_lines": self.bad_lines,
+        }